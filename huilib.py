@@ -1,7 +1,21 @@
-import hou
+import os
+import json
 import tempfile
+import time
 import types
-import collections
+import functools
+
+try:
+    from collections.abc import Iterable
+except ImportError:
+    from collections import Iterable
+
+try:
+    import hou
+except ImportError:
+    hou = None
+
+_headless = None
 
 def _attributes_to_string(obj, atrr_dict):
     for k, v in atrr_dict.items():
@@ -21,10 +35,34 @@ def _randname():
     return ''.join(choice(ascii_lowercase) for x in range(4))
 
 
+def setHeadless(value = True):
+    """
+    Forces headless mode on or off. setHeadless(None) goes back to auto detection.
+    """
+    global _headless
+    _headless = value
+
+
+def isHeadless():
+    """
+    True when dialogs should not be built: set with setHeadless(), the
+    HUILIB_HEADLESS environment variable, or when no Houdini UI is available
+    (hython, render farm).
+    """
+    if _headless is not None:
+        return _headless
+    env = os.environ.get('HUILIB_HEADLESS')
+    if env is not None:
+        return env.lower() not in ('', '0', 'false', 'no')
+    return hou is None or not hou.isUIAvailable()
+
+
 def findDialog(name):
     """
     Finds dialog by name. Dialog can be destroyed (destroy()) or shown (show())
     """
+    if isHeadless():
+        return None
     uival = "%s_ui.val" % name
     def show(self):
         self.setValue(uival, 1)
@@ -39,6 +77,78 @@ def findDialog(name):
     return None
 
 
+class HSuspendUpdates(object):
+    """
+    Context manager for callbacks that create or modify many nodes.
+    Switches the update mode to manual and opens one undo group, so the scene
+    cooks and redraws once on exit instead of once per change. The previous
+    update mode is restored even if the body raises. The time spent is kept
+    in elapsed, and printed with report = True.
+
+    with HSuspendUpdates('Import geo'):
+        ...
+    """
+    def __init__(self, label = 'huilib', report = False):
+        self.label = label
+        self.report = report
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self._start = time.time()
+        self._undo_group = None
+        if hou is None:
+            return self
+        # Open the undo group first, so a failure leaves the update mode untouched
+        undo_group = hou.undos.group(self.label)
+        undo_group.__enter__()
+        try:
+            self._update_mode = hou.updateModeSetting()
+            hou.setUpdateMode(hou.updateMode.Manual)
+        except Exception as e:
+            undo_group.__exit__(type(e), e, None)
+            raise
+        self._undo_group = undo_group
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        try:
+            if self._undo_group is not None:
+                self._undo_group.__exit__(exc_type, exc_value, tb)
+        finally:
+            if hou is not None:
+                hou.setUpdateMode(self._update_mode)
+                if self._update_mode != hou.updateMode.Manual and hou.isUIAvailable():
+                    hou.ui.triggerUpdate()
+            self.elapsed = time.time() - self._start
+            if self.report:
+                print("huilib: %s took %.3f sec" % (self.label, self.elapsed))
+        return False
+
+
+def suspendUpdates(func = None, label = None, report = False):
+    """
+    Decorator running func inside HSuspendUpdates. Can be used as
+    @suspendUpdates or @suspendUpdates(label = 'Import', report = True).
+    The time of the last call is kept in the wrapper's elapsed attribute.
+    """
+    def decorator(f):
+        # partials and callable objects have no __name__
+        def wrapper(*args, **kwargs):
+            suspend = HSuspendUpdates(label or getattr(f, '__name__', 'huilib'), report)
+            try:
+                with suspend:
+                    return f(*args, **kwargs)
+            finally:
+                wrapper.elapsed = suspend.elapsed
+        if hasattr(f, '__name__'):
+            wrapper = functools.wraps(f)(wrapper)
+        wrapper.elapsed = 0.0
+        return wrapper
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
 class HBaseContainer(object):
     def __init__(self):
         self.child_list = []
@@ -56,6 +166,9 @@ class HBaseContainer(object):
 
 
 class HBaseGadget(object):
+    # Value a fresh dialog reports for this gadget, used to seed headless dialogs
+    _default_value = 0
+
     def __init__(self, name, label):
         self.name = "%s.gad" % name
         self.label = label
@@ -66,6 +179,9 @@ class HBaseGadget(object):
         self.dialog = None
         self.init_value = None
         self.callbacks = set()
+        self._value_callbacks = set()
+        self._dispatcher = None
+        self._lazy_owner = None
 
     def setAttributes(self, **kwargs):
         """
@@ -101,20 +217,171 @@ class HBaseGadget(object):
             self.init_value = value
 
 
+    def _ensure_materialized(self):
+        # Gadgets in an unexpanded lazy collapser are wired on first use
+        if not self.dialog and self._lazy_owner:
+            self._lazy_owner.materialize()
+
     def getValue(self):
+        self._ensure_materialized()
         if self.dialog:
             return self.dialog.value(self._ui_value)
         else:
             raise ValueError('Can\'t get value for %s gadget' % self.name)
 
     def _set_multivalue(self, iterable):
-        self.dialog.setValue(self._ui_value[0], iterable[0])
-        self.dialog.setValue(self._ui_value[1], iterable[1])
-        self.dialog.setValue(self._ui_value[2], iterable[2])
+        # Component events fired while setting are collapsed into one dispatch
+        if self._dispatcher:
+            self._dispatcher.block(self)
+        try:
+            for ui_value, value in zip(self._ui_value, iterable):
+                self.dialog.setValue(ui_value, value)
+        finally:
+            if self._dispatcher:
+                self._dispatcher.unblock(self)
 
 
-    def connect(self, func):
+    def connect(self, func, suspend_updates = False, pass_value = False, report = False):
+        """
+        Connects func to the gadget value. Callbacks are called without
+        arguments, with pass_value = True they receive the new gadget value.
+        With suspend_updates = True the callback runs inside HSuspendUpdates
+        (manual update mode, one undo group), report = True prints its timing.
+        Returns the connected callback; when suspended, its elapsed attribute
+        holds the time of the last call.
+        """
+        if suspend_updates and hasattr(func, '__call__'):
+            func = suspendUpdates(func, report = report)
         self.callbacks.add(func)
+        if pass_value:
+            self._value_callbacks.add(func)
+        return func
+
+    def trigger(self):
+        """
+        Runs connected callbacks with the current value, as if the gadget
+        was edited. Useful in headless mode where nobody clicks anything.
+        """
+        self._ensure_materialized()
+        if self._dispatcher:
+            self._dispatcher._invoke(self, force = True)
+        elif self.dialog:
+            self._run_callbacks(self.getValue())
+        else:
+            # Before initUI there is no dialog, callbacks get init_value
+            self._run_callbacks(self.init_value)
+
+    def _run_callbacks(self, value):
+        for cb in list(self.callbacks):
+            if not hasattr(cb, '__call__'):
+                continue
+            if cb in self._value_callbacks:
+                cb(value)
+            else:
+                cb()
+
+
+class _HCallbackDispatcher(object):
+    """
+    Routes dialog value events to gadget callbacks. One host callback is
+    registered per value path, and component events of multi-value gadgets
+    (colors, vectors) are collapsed into a single call per edit.
+
+    For setValue() from Python the collapsing is exact: component events are
+    blocked while the components are set, then dispatched once. For edits made
+    in the dialog, huilib cannot tell where one edit ends. It skips an event
+    when the full value equals the last dispatched one. That gives one call
+    per edit only if Houdini updates all components before it fires the first
+    callback. A host that fires after each component still produces one call
+    per changed component. It also means an edit that leaves a color or vector
+    unchanged does not call its callbacks, while scalar gadgets always do.
+    """
+    def __init__(self, dialog):
+        self.dialog = dialog
+        self._routes = {}
+        self._handlers = {}
+        self._last_values = {}
+        self._blocked = {}
+
+    def register(self, gadget):
+        gadget._dispatcher = self
+        if not any(hasattr(cb, '__call__') for cb in gadget.callbacks):
+            return
+        paths = gadget._ui_value if isinstance(gadget._ui_value, list) else [gadget._ui_value]
+        for path in paths:
+            self._routes[path] = gadget
+            if path not in self._handlers:
+                self._handlers[path] = self._make_handler(path)
+                self.dialog.addCallback(path, self._handlers[path])
+
+    def _make_handler(self, path):
+        def handler():
+            self.dispatch(path)
+        return handler
+
+    def block(self, gadget):
+        self._blocked[gadget] = False
+
+    def unblock(self, gadget):
+        pending = self._blocked.pop(gadget, False)
+        if pending:
+            self._invoke(gadget)
+
+    def dispatch(self, path):
+        gadget = self._routes.get(path)
+        if gadget is None:
+            return
+        if gadget in self._blocked:
+            self._blocked[gadget] = True
+            return
+        self._invoke(gadget)
+
+    def _invoke(self, gadget, force = False):
+        value = gadget.getValue()
+        if isinstance(gadget._ui_value, list) and not force:
+            # Assumes the host set all components before firing, see class docstring
+            if gadget in self._last_values and self._last_values[gadget] == value:
+                return
+            self._last_values[gadget] = value
+        gadget._run_callbacks(value)
+
+
+class _HHeadlessDialog(object):
+    """
+    In-memory stand-in for hou.Dialog used in headless mode. Values live in a
+    plain table; setValue does not fire callbacks, use HBaseGadget.trigger().
+    """
+    def __init__(self, name):
+        self.name = name
+        self._values = {}
+        self._enabled = {}
+        self._menus = {}
+        self._callbacks = {}
+
+    def value(self, ui_value):
+        return self._values.get(ui_value)
+
+    def setValue(self, ui_value, value):
+        self._values[ui_value] = value
+
+    def enableValue(self, ui_value, value):
+        self._enabled[ui_value] = value
+
+    def menuItems(self, ui_value):
+        return self._menus.get(ui_value, ())
+
+    def setMenuItems(self, ui_value, items):
+        self._menus[ui_value] = tuple(items)
+
+    def addCallback(self, ui_value, callback):
+        self._callbacks.setdefault(ui_value, []).append(callback)
+
+    def removeCallback(self, ui_value, callback):
+        self._callbacks[ui_value].remove(callback)
+
+    def destroy(self):
+        self._values.clear()
+        self._callbacks.clear()
 
 
 class HRowLayout(HBaseContainer):
@@ -145,6 +412,44 @@ class HCollapserLayout(HBaseContainer):
         return 'COLLAPSER "%s"' % self._label
 
 
+class HLazyCollapserLayout(HCollapserLayout):
+    """
+    Collapser whose gadgets are wired (init values, callbacks, enabled state)
+    only when it is first expanded. Until then only the collapser itself is
+    connected to the dialog.
+    """
+    def __init__(self, name, label = 'Collapser', layout = 'horizontal'):
+        super(HLazyCollapserLayout, self).__init__(label, layout)
+        self._ui_value = "%s.val" % name
+        self.dialog = None
+        self.materialized = False
+        self._window = None
+        self._pending = []
+
+    def isExpanded(self):
+        if self.dialog:
+            return bool(self.dialog.value(self._ui_value))
+        return False
+
+    def materialize(self):
+        if self.materialized or self._window is None or self._window.dialog is None:
+            return
+        # The toggle callback stays registered, it is a no-op from now on
+        self.materialized = True
+        pending, self._pending = self._pending, []
+        for item in pending:
+            item._lazy_owner = None
+            self._window._init_item(item, deferred = True)
+
+    def _on_toggle(self):
+        if self.isExpanded():
+            self.materialize()
+
+    def __repr__(self):
+        _s = super(HLazyCollapserLayout, self).__repr__()
+        return '%s VALUE(%s)' % (_s, self._ui_value)
+
+
 class HButton(HBaseGadget):
     def __init__(self, name, label):
         super(HButton, self).__init__(name, label)
@@ -240,6 +545,8 @@ class HLabel(HBaseGadget):
         return _s
 
 class HStringField(HBaseGadget):
+    _default_value = ""
+
     def __init__(self, name, label):
         super(HStringField, self).__init__(name, label)
 
@@ -252,6 +559,8 @@ class HStringField(HBaseGadget):
         return _s
 
 class HFloatSlider(HBaseGadget):
+    _default_value = 0.0
+
     def __init__(self, name, label, noInputField = False):
         super(HFloatSlider, self).__init__(name, label)
         self.no_field = noInputField
@@ -333,6 +642,8 @@ class HIntSlider(HBaseGadget):
 #         return _s
 
 class HFileField(HBaseGadget):
+    _default_value = ""
+
     def __init__(self, name, label, type_filter = 'all'):
         super(HFileField, self).__init__(name, label)
         self.type_filter = type_filter
@@ -346,20 +657,26 @@ class HFileField(HBaseGadget):
 
 
 class HColorSelector(HBaseGadget):
+    _default_value = 0.0
+
     def __init__(self, name, label):
         super(HColorSelector, self).__init__(name, label)
         self._ui_value = ["%s.%s" % (self.name, comp) for comp in 'rgb']
 
     def getValue(self):
+        self._ensure_materialized()
         if self.dialog:
-            return hou.Color([self.dialog.value(v) for v in self._ui_value])
+            values = [self.dialog.value(v) for v in self._ui_value]
+            if hou is None:
+                return values
+            return hou.Color(values)
 
 
     def setValue(self, color_value):
         if self.dialog:
-            if isinstance(color_value, hou.Color):
+            if hou is not None and isinstance(color_value, hou.Color):
                 values = color_value.rgb()
-            elif isinstance(color_value, collections.Iterable):
+            elif isinstance(color_value, Iterable):
                 values = tuple(color_value)
             self._set_multivalue(values)
         else:
@@ -380,15 +697,21 @@ class HColorSelector(HBaseGadget):
         return _s
 
 class HVectorField(HBaseGadget):
+    _default_value = 0.0
+
     def __init__(self, name, label, size = 3):
-        assert 2 < size <= 4, "HVectorField size can be 2, 3 or 4"
+        assert 2 <= size <= 4, "HVectorField size can be 2, 3 or 4"
         super(HVectorField, self).__init__(name, label)
         self._size = size
         valcomponent = "xyzw"[:self._size]
         self._ui_value = ["%s.%s" % (self._ui_value, comp) for comp in valcomponent]
-        self._vecclass = {2: hou.Vector2, 3: hou.Vector3, 4: hou.Vector4}[size]
+        if hou is not None:
+            self._vecclass = {2: hou.Vector2, 3: hou.Vector3, 4: hou.Vector4}[size]
+        else:
+            self._vecclass = list
 
     def getValue(self):
+        self._ensure_materialized()
         if self.dialog:
             val = [0.0 for i in range(self._size)]
             tmp = [self.dialog.value(v) for v in self._ui_value]
@@ -425,6 +748,7 @@ class _HBaseMenu(HBaseGadget):
         self.items = items
 
     def menuItems(self):
+        self._ensure_materialized()
         if self.dialog:
             return self.dialog.menuItems(self._ui_value)
 
@@ -482,6 +806,7 @@ class HBaseWindow(object):
         self._gadgets_flatten_list = []
         self._menu_definitions = ""
         self.dialog = None
+        self._dispatcher = None
 
     def _indentWrite(self, string):
         self.ui_str += " "*4 + string + '\n'
@@ -517,21 +842,28 @@ class HBaseWindow(object):
 
     def _write_layouts(self):
         _attributes_to_string(self, self.attributes)
-        def traverse_layout(item):
+        # Gadgets under a lazy collapser are queued on it instead of the flatten list
+        def traverse_layout(item, pending, owner):
             if isinstance(item, HBaseGadget):
                 self._write_gadget(item)
-                self._gadgets_flatten_list.append(item)
+                pending.append(item)
+                item._lazy_owner = owner
 
             elif isinstance(item, HBaseContainer):
                 self._indentWrite(item.__repr__())
                 self._indentWrite('{')
                 self._indentWrite(item.attributes_string)
+                if isinstance(item, HLazyCollapserLayout):
+                    item._window = self
+                    pending.append(item)
+                    item._pending = pending = []
+                    owner = item
                 for sub_item in item.child_list:
-                    traverse_layout(sub_item)
+                    traverse_layout(sub_item, pending, owner)
                 self._indentWrite('}\n')
 
         for item in self.items_list:
-            traverse_layout(item)
+            traverse_layout(item, self._gadgets_flatten_list, None)
 
 
     def _make_ui_string(self):
@@ -544,7 +876,49 @@ class HBaseWindow(object):
         self._write_layouts()
         self.ui_str += "\n}"
 
+    def _collect_gadgets(self):
+        gadgets = []
+        def traverse_layout(item):
+            if isinstance(item, HBaseGadget):
+                gadgets.append(item)
+            elif isinstance(item, HBaseContainer):
+                for sub_item in item.child_list:
+                    traverse_layout(sub_item)
+        for item in self.items_list:
+            traverse_layout(item)
+        return gadgets
+
+    def loadPreset(self, preset):
+        """
+        Sets gadget values from a dict or a JSON file mapping gadget names
+        (as passed to the gadget constructor) to values. Can be called before
+        or after initUI.
+        """
+        if not isinstance(preset, dict):
+            with open(preset) as f:
+                preset = json.load(f)
+        for gadget in self._collect_gadgets():
+            name = gadget.name[:-len('.gad')]
+            if name in preset:
+                gadget.setValue(preset[name])
+
+    def _init_headless(self):
+        # No ui script and no hou.ui: gadgets read and write an in-memory table
+        self.dialog = _HHeadlessDialog(self.name)
+        self._dispatcher = _HCallbackDispatcher(self.dialog)
+        self._gadgets_flatten_list = self._collect_gadgets()
+        for item in self._gadgets_flatten_list:
+            ui_values = item._ui_value if isinstance(item._ui_value, list) else [item._ui_value]
+            for ui_value in ui_values:
+                self.dialog.setValue(ui_value, item._default_value)
+            if isinstance(item, _HBaseMenu):
+                self.dialog.setMenuItems(item._ui_value, item.items)
+            self._init_item(item)
+
     def initUI(self):
+        if isHeadless():
+            self._init_headless()
+            return
         self._make_ui_string()
         tmp_f = tempfile.mktemp(suffix ='huilib')
         with open(tmp_f, 'w') as f:
@@ -559,30 +933,42 @@ class HBaseWindow(object):
             from os import remove
             remove(tmp_f)
 
-        # Pass dialog instance to gadget objects , also set Enabled/Disable attr
+        self._dispatcher = _HCallbackDispatcher(self.dialog)
+
         for item in self._gadgets_flatten_list:
+            self._init_item(item)
+
+    def _init_item(self, item, deferred = False):
+        if isinstance(item, HLazyCollapserLayout):
             item.dialog = self.dialog
+            if item.materialized:
+                return
+            if item.isExpanded():
+                item.materialize()
+            else:
+                self.dialog.addCallback(item._ui_value, item._on_toggle)
+            return
 
-            # Set init values
-            if item.init_value:
-                item.setValue(item.init_value)
+        # Pass dialog instance to gadget objects , also set Enabled/Disable attr
+        item.dialog = self.dialog
 
-            # Add callbacks
-            if item.callbacks:
-                for cb in item.callbacks:
-                    if hasattr(cb, '__call__'):
-                        if isinstance(item._ui_value, list):
-                            for valuecomp in item._ui_value:
-                                self.dialog.addCallback(valuecomp, cb)
-                        else:
-                            self.dialog.addCallback(item._ui_value, cb)
+        # Set init values
+        if item.init_value:
+            item.setValue(item.init_value)
 
+        # Menu items may have changed since the ui script was written
+        if deferred and isinstance(item, _HBaseMenu):
+            item.setMenuItems(item.items)
 
-            # Set enable/disable
-            try:
-                item.setEnabled(item.enabled)
-            except hou.OperationFailed as e:
-                pass
+        # Add callbacks
+        if item.callbacks:
+            self._dispatcher.register(item)
+
+        # Set enable/disable
+        try:
+            item.setEnabled(item.enabled)
+        except hou.OperationFailed as e:
+            pass
 
     def show(self):
         self.dialog.setValue(self._ui_value, True)
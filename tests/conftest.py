@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stub_hou
+sys.modules['hou'] = stub_hou
+
+import huilib
+
+
+@pytest.fixture(autouse = True)
+def ui_mode():
+    huilib.setHeadless(False)
+    yield
+    huilib.setHeadless(None)
@@ -0,0 +1,126 @@
+"""
+Minimal stand-in for the hou module, enough to build and drive huilib dialogs
+outside Houdini.
+"""
+
+
+class OperationFailed(Exception):
+    pass
+
+
+class Color(object):
+    def __init__(self, rgb):
+        self._rgb = tuple(rgb)
+
+    def rgb(self):
+        return self._rgb
+
+    def __eq__(self, other):
+        return isinstance(other, Color) and other._rgb == self._rgb
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class Vector2(list):
+    pass
+
+
+class Vector3(list):
+    pass
+
+
+class Vector4(list):
+    pass
+
+
+class Dialog(object):
+    """
+    Records host calls. setValue fires callbacks like hou.Dialog does,
+    edit() simulates the user changing several values at once.
+    """
+    def __init__(self, ui_file):
+        with open(ui_file) as f:
+            self.ui_str = f.read()
+        self.values = {}
+        self.enabled = {}
+        self.menus = {}
+        self.callbacks = {}
+
+    def value(self, name):
+        return self.values.get(name, 0)
+
+    def setValue(self, name, value):
+        self.values[name] = value
+        self._fire(name)
+
+    def edit(self, values):
+        self.values.update(values)
+        for name in values:
+            self._fire(name)
+
+    def _fire(self, name):
+        for cb in list(self.callbacks.get(name, [])):
+            cb()
+
+    def enableValue(self, name, value):
+        self.enabled[name] = value
+
+    def menuItems(self, name):
+        return self.menus.get(name, ())
+
+    def setMenuItems(self, name, items):
+        self.menus[name] = tuple(items)
+
+    def addCallback(self, name, callback):
+        self.callbacks.setdefault(name, []).append(callback)
+
+    def removeCallback(self, name, callback):
+        self.callbacks[name].remove(callback)
+
+
+class ui(object):
+    @staticmethod
+    def createDialog(ui_file):
+        return Dialog(ui_file)
+
+    @staticmethod
+    def dialogs():
+        return ()
+
+    @staticmethod
+    def triggerUpdate():
+        pass
+
+
+class updateMode(object):
+    AutoUpdate = 'auto'
+    OnMouseUp = 'on_mouse_up'
+    Manual = 'manual'
+
+
+_update_mode = [updateMode.AutoUpdate]
+
+
+def updateModeSetting():
+    return _update_mode[0]
+
+
+def setUpdateMode(mode):
+    _update_mode[0] = mode
+
+
+class undos(object):
+    class group(object):
+        def __init__(self, label):
+            self.label = label
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+
+def isUIAvailable():
+    return True
@@ -0,0 +1,351 @@
+import functools
+
+import hou
+import huilib
+
+
+def make_dialog(*items):
+    dlg = huilib.HDialog('test_dlg', 'Test')
+    for item in items:
+        if isinstance(item, huilib.HBaseContainer):
+            dlg.addLayout(item)
+        else:
+            dlg.addGadget(item)
+    dlg.initUI()
+    return dlg
+
+
+def test_color_edit_calls_callback_once():
+    calls = []
+    color = huilib.HColorSelector('clr', 'Color')
+    color.connect(lambda: calls.append('clr'))
+    dlg = make_dialog(color)
+
+    dlg.dialog.edit(dict(zip(color._ui_value, (1.0, 0.5, 0.2))))
+    assert calls == ['clr']
+
+
+def test_set_multivalue_collapses_component_events():
+    values = []
+    vec = huilib.HVectorField('vec', 'Vector', size = 4)
+    vec.connect(values.append, pass_value = True)
+    dlg = make_dialog(vec)
+
+    vec.setValue([1, 2, 3, 4])
+    assert values == [[1.0, 2.0, 3.0, 4.0]]
+
+
+def test_one_host_callback_per_value_path():
+    vec = huilib.HVectorField('vec', 'Vector', size = 2)
+    vec.connect(lambda: None)
+    vec.connect(lambda: None)
+    dlg = make_dialog(vec)
+
+    assert [len(dlg.dialog.callbacks[path]) for path in vec._ui_value] == [1, 1]
+
+
+def test_callbacks_without_pass_value_get_no_arguments():
+    calls = []
+    def cb(*args):
+        calls.append(args)
+    btn = huilib.HButton('btn', 'Button')
+    btn.connect(cb)
+    dlg = make_dialog(btn)
+
+    dlg.dialog.setValue(btn._ui_value, 1)
+    dlg.dialog.setValue(btn._ui_value, 1)
+    assert calls == [(), ()]
+
+
+def test_suspend_updates_restores_mode_on_error(capsys):
+    modes = []
+    def cb():
+        modes.append(hou.updateModeSetting())
+        raise RuntimeError('boom')
+    btn = huilib.HButton('btn', 'Button')
+    btn.connect(cb, suspend_updates = True)
+    dlg = make_dialog(btn)
+
+    try:
+        dlg.dialog.setValue(btn._ui_value, 1)
+    except RuntimeError:
+        pass
+    assert modes == [hou.updateMode.Manual]
+    assert hou.updateModeSetting() == hou.updateMode.AutoUpdate
+    assert capsys.readouterr().out == ''
+
+
+def test_suspend_updates_keeps_mode_when_undo_group_fails(monkeypatch):
+    class FailingGroup(object):
+        def __init__(self, label):
+            pass
+
+        def __enter__(self):
+            raise hou.OperationFailed()
+
+    monkeypatch.setattr(hou.undos, 'group', FailingGroup)
+    try:
+        with huilib.HSuspendUpdates('test'):
+            pass
+    except hou.OperationFailed:
+        pass
+    assert hou.updateModeSetting() == hou.updateMode.AutoUpdate
+
+
+def test_suspend_updates_report(capsys):
+    with huilib.HSuspendUpdates('bulk', report = True) as suspend:
+        pass
+    assert suspend.elapsed >= 0.0
+    assert 'huilib: bulk took' in capsys.readouterr().out
+
+
+def make_lazy_dialog():
+    field = huilib.HStringField('field', 'Field')
+    field.setValue('init')
+    calls = []
+    field.connect(lambda: calls.append('field'))
+    collapser = huilib.HLazyCollapserLayout('adv', 'Advanced')
+    col = huilib.HColumnLayout()
+    col.addGadget(field)
+    collapser.addLayout(col)
+    dlg = make_dialog(collapser)
+    return dlg, collapser, field, calls
+
+
+def test_lazy_collapser_defers_wiring():
+    dlg, collapser, field, calls = make_lazy_dialog()
+
+    assert not collapser.materialized
+    assert field.dialog is None
+    assert field._ui_value not in dlg.dialog.values
+    assert 'STRING_FIELD "Field"' in dlg.dialog.ui_str
+
+    dlg.dialog.setValue(collapser._ui_value, 1)
+    assert collapser.materialized
+    assert dlg.dialog.values[field._ui_value] == 'init'
+    dlg.dialog.setValue(field._ui_value, 'new')
+    assert calls == ['field']
+
+
+def test_lazy_collapser_materializes_on_nested_get_value():
+    dlg, collapser, field, calls = make_lazy_dialog()
+
+    assert field.getValue() == 'init'
+    assert collapser.materialized
+
+
+def test_nested_lazy_collapsers():
+    inner_field = huilib.HStringField('inner_field', 'Inner')
+    inner_field.setValue('inner')
+    inner = huilib.HLazyCollapserLayout('inner', 'Inner')
+    row = huilib.HRowLayout()
+    row.addGadget(inner_field)
+    inner.addLayout(row)
+    outer = huilib.HLazyCollapserLayout('outer', 'Outer')
+    outer.addLayout(inner)
+    dlg = make_dialog(outer)
+
+    assert inner_field.getValue() == 'inner'
+    assert inner.materialized and not outer.materialized
+    dlg.dialog.setValue(outer._ui_value, 1)
+    assert outer.materialized and inner.dialog is dlg.dialog
+
+
+def make_headless_dialog():
+    huilib.setHeadless(True)
+    dlg = huilib.HDialog('headless_dlg', 'Headless')
+    dlg.check = huilib.HCheckbox('check', 'Check')
+    dlg.slider = huilib.HFloatSlider('slider', 'Slider')
+    dlg.text = huilib.HStringField('text', 'Text')
+    dlg.menu = huilib.HStringMenu('menu', 'Menu', ['a', 'b'])
+    dlg.color = huilib.HColorSelector('color', 'Color')
+    dlg.vec = huilib.HVectorField('vec', 'Vector')
+    collapser = huilib.HLazyCollapserLayout('adv', 'Advanced')
+    dlg.hidden = huilib.HIntSlider('hidden', 'Hidden')
+    collapser.addGadget(dlg.hidden)
+    for gadget in (dlg.check, dlg.slider, dlg.text, dlg.menu, dlg.color, dlg.vec):
+        dlg.addGadget(gadget)
+    dlg.addLayout(collapser)
+    return dlg
+
+
+def test_headless_skips_dialog_creation(monkeypatch):
+    def fail(ui_file):
+        raise AssertionError('createDialog called in headless mode')
+    monkeypatch.setattr(hou.ui, 'createDialog', fail)
+    dlg = make_headless_dialog()
+    dlg.initUI()
+
+    assert isinstance(dlg.dialog, huilib._HHeadlessDialog)
+    assert dlg.ui_str == ''
+
+
+def test_headless_default_values():
+    dlg = make_headless_dialog()
+    dlg.initUI()
+
+    assert dlg.check.isChecked() == 0
+    assert dlg.slider.getValue() == 0.0
+    assert dlg.text.getValue() == ''
+    assert dlg.menu.getValue() == 0
+    assert dlg.menu.menuItems() == ('a', 'b')
+    assert dlg.color.getValue() == hou.Color((0.0, 0.0, 0.0))
+    assert dlg.vec.getValue() == [0.0, 0.0, 0.0]
+    assert dlg.hidden.getValue() == 0
+
+
+def test_headless_preset_and_init_values(tmp_path):
+    dlg = make_headless_dialog()
+    dlg.text.setValue('init')
+    preset = tmp_path / 'preset.json'
+    preset.write_text('{"slider": 0.5, "hidden": 3, "vec": [1, 2, 3]}')
+    dlg.loadPreset(str(preset))
+    dlg.initUI()
+
+    assert dlg.text.getValue() == 'init'
+    assert dlg.slider.getValue() == 0.5
+    assert dlg.hidden.getValue() == 3
+    assert dlg.vec.getValue() == [1.0, 2.0, 3.0]
+
+
+def test_headless_trigger_runs_callbacks():
+    dlg = make_headless_dialog()
+    values = []
+    dlg.text.connect(values.append, pass_value = True)
+    dlg.initUI()
+    dlg.text.setValue('farm')
+
+    assert values == []
+    dlg.text.trigger()
+    assert values == ['farm']
+
+
+def test_trigger_before_init_ui():
+    calls = []
+    btn = huilib.HButton('btn', 'Button')
+    btn.connect(lambda: calls.append('btn'))
+    btn.trigger()
+    assert calls == ['btn']
+
+
+def test_suspend_updates_with_partial():
+    calls = []
+    btn = huilib.HButton('btn', 'Button')
+    btn.connect(functools.partial(calls.append, 'partial'), suspend_updates = True)
+    dlg = make_dialog(btn)
+
+    dlg.dialog.setValue(btn._ui_value, 1)
+    assert calls == ['partial']
+
+
+def test_suspend_updates_with_callable_object():
+    class Callback(object):
+        def __init__(self):
+            self.calls = 0
+
+        def __call__(self):
+            self.calls += 1
+
+    cb = Callback()
+    btn = huilib.HButton('btn', 'Button')
+    btn.connect(cb, suspend_updates = True)
+    dlg = make_dialog(btn)
+
+    dlg.dialog.setValue(btn._ui_value, 1)
+    assert cb.calls == 1
+
+
+def test_suspend_updates_skips_non_callable():
+    btn = huilib.HButton('btn', 'Button')
+    btn.connect('not callable', suspend_updates = True)
+    dlg = make_dialog(btn)
+
+    dlg.dialog.setValue(btn._ui_value, 1)
+
+
+def test_suspend_updates_elapsed_on_connected_callback(capsys):
+    btn = huilib.HButton('btn', 'Button')
+    cb = btn.connect(lambda: None, suspend_updates = True)
+    dlg = make_dialog(btn)
+
+    cb.elapsed = -1.0
+    dlg.dialog.setValue(btn._ui_value, 1)
+    assert cb.elapsed >= 0.0
+    assert capsys.readouterr().out == ''
+
+
+def test_lazy_collapser_materializes_on_trigger():
+    dlg, collapser, field, calls = make_lazy_dialog()
+    values = []
+    field.connect(values.append, pass_value = True)
+
+    field.trigger()
+    assert collapser.materialized
+    assert values == ['init']
+    assert calls == ['field']
+
+
+def test_lazy_collapser_materializes_on_menu_items():
+    menu = huilib.HStringMenu('menu', 'Menu', ['a', 'b'])
+    collapser = huilib.HLazyCollapserLayout('adv', 'Advanced')
+    row = huilib.HRowLayout()
+    row.addGadget(menu)
+    collapser.addLayout(row)
+    dlg = make_dialog(collapser)
+
+    assert menu.menuItems() == ('a', 'b')
+    assert collapser.materialized
+
+
+def test_lazy_collapser_toggle_after_materialize():
+    dlg, collapser, field, calls = make_lazy_dialog()
+
+    dlg.dialog.setValue(collapser._ui_value, 1)
+    dlg.dialog.setValue(collapser._ui_value, 0)
+    dlg.dialog.setValue(collapser._ui_value, 1)
+    assert collapser.materialized
+    assert len(dlg.dialog.callbacks[collapser._ui_value]) == 1
+
+
+def test_unchanged_multivalue_edit_is_skipped():
+    calls = []
+    color = huilib.HColorSelector('clr', 'Color')
+    color.connect(lambda: calls.append('clr'))
+    dlg = make_dialog(color)
+    edit = dict(zip(color._ui_value, (1.0, 0.5, 0.2)))
+
+    dlg.dialog.edit(edit)
+    dlg.dialog.edit(edit)
+    assert calls == ['clr']
+
+
+def test_headless_env_variable(monkeypatch):
+    huilib.setHeadless(None)
+    monkeypatch.setenv('HUILIB_HEADLESS', '1')
+    assert huilib.isHeadless()
+    monkeypatch.setenv('HUILIB_HEADLESS', '0')
+    assert not huilib.isHeadless()
+    monkeypatch.setenv('HUILIB_HEADLESS', '')
+    assert not huilib.isHeadless()
+
+
+def test_headless_auto_detection(monkeypatch):
+    huilib.setHeadless(None)
+    monkeypatch.delenv('HUILIB_HEADLESS', raising = False)
+    assert not huilib.isHeadless()
+
+    monkeypatch.setattr(hou, 'isUIAvailable', lambda: False)
+    assert huilib.isHeadless()
+
+
+def test_headless_without_hou(monkeypatch):
+    huilib.setHeadless(None)
+    monkeypatch.delenv('HUILIB_HEADLESS', raising = False)
+    monkeypatch.setattr(huilib, 'hou', None)
+    assert huilib.isHeadless()
+
+
+def test_set_headless_overrides_env(monkeypatch):
+    monkeypatch.setenv('HUILIB_HEADLESS', '1')
+    huilib.setHeadless(False)
+    assert not huilib.isHeadless()